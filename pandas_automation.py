@@ -9,23 +9,32 @@ Original file is located at
 **Install packages**
 """
 
-import nltk
 import spacy
-from nltk.corpus import wordnet
-from spacy import displacy
+from functools import lru_cache
+from spacy.tokens import Doc, Token
 
 """# Load parsing routines"""
+# load the model once per process instead of on every call
+@lru_cache(maxsize=None)
+def get_nlp():
+  return spacy.load("en_core_web_sm")
+
+# accepts raw text or an already-parsed Doc so callers can share one parse
+def as_doc(text):
+  if isinstance(text, Doc):
+    return text
+  return get_nlp()(text)
+
 def show_chunks(text):
-  nlp = spacy.load("en_core_web_sm")
-  doc = nlp(text)
+  doc = as_doc(text)
   for chunk in doc.noun_chunks:
     print(chunk.text, chunk.root.text, chunk.root.dep_,
           chunk.root.head.text)
 def print_pic(text):
-  nlp = spacy.load("en_core_web_sm")
-  doc = nlp(text)
+  doc = as_doc(text)
   import webbrowser
   from pathlib import Path
+  from spacy import displacy
   html = displacy.render(doc, style="dep")
   out_path = Path.cwd() / "dep_parse.html"
   out_path.write_text(html, encoding="utf-8")
@@ -37,14 +46,14 @@ def print_chunks_pic(text):
   doc = nlp(text)
   import webbrowser
   from pathlib import Path
+  from spacy import displacy
   html = displacy.render(doc, style="dep")
   out_path = Path.cwd() / "dep_chunks_parse.html"
   out_path.write_text(html, encoding="utf-8")
   print(f"Wrote {out_path} ({len(html)} bytes)")
   webbrowser.open(out_path.as_uri())
 def is_equative(clause):
-  nlp = spacy.load("en_core_web_sm")
-  clause_tokens = nlp(clause)
+  clause_tokens = as_doc(clause)
   dec_made = False
   clause_attr = False
   for token in clause_tokens:
@@ -74,8 +83,7 @@ def is_equative(clause):
 
 def rearrange_noun_phrase(noun_phrase):
 #moves preposition phrase to back from front
-  nlp = spacy.load("en_core_web_sm")
-  noun_tokens = nlp(noun_phrase)
+  noun_tokens = get_nlp()(noun_phrase)
   return_phrase =''
   root_pos = 0
   word2add =''
@@ -100,7 +108,7 @@ def rearrange_noun_phrase(noun_phrase):
 
 # takes a noun phrase and gives a concatenation of all the prepositional phrases that follow the head noun
 def get_base_simple(noun_phrase):
-  nlp = spacy.load("en_core_web_sm")
+  nlp = get_nlp()
   phrase_rearranged = rearrange_noun_phrase(noun_phrase)
   l_edges = set()
   r_edges = set()
@@ -136,10 +144,9 @@ def get_base_simple(noun_phrase):
 
 # is it of the form 'the the nouns phrase is A'?
 def is_encrypting(clause):
-  nlp = spacy.load("en_core_web_sm")
   dec_encrypt = False
-  if is_equative(clause)==True:
-    clause_tokens = nlp(clause)
+  clause_tokens = as_doc(clause)
+  if is_equative(clause_tokens)==True:
     for token in clause_tokens:
       if token.dep_ == 'attr' and token.head.dep_ == 'ROOT':
         for child in token.children:
@@ -210,52 +217,63 @@ def get_right_noun_without_embed(atoken):
   return return_right #max(right_edges)
 
 def is_indication_clause(text):
-  nlp = spacy.load("en_core_web_sm")
-  clause_tokens = nlp(text)
+  clause_tokens = as_doc(text)
   dec_made = False
   for token in clause_tokens:
-    if token.dep_ == 'ROOT' and is_syn_with(token.text,'indicate'):
+    if token.dep_ == 'ROOT' and is_syn_with(token,'indicate'):
       dec_made = True
   return dec_made
 
 def is_probability_clause(text):
 
-  nlp = spacy.load("en_core_web_sm")
-  clause_tokens = nlp(text)
+  clause_tokens = as_doc(text)
   dec_made = False
   for token in clause_tokens:
-    if is_syn_with(token.text,'chance') and token.head.dep_ == 'ROOT' and is_syn_with(token.head.text,'is'):
+    if is_syn_with(token,'chance') and token.head.dep_ == 'ROOT' and is_syn_with(token.head,'is'):
       if token.dep_ == 'attr' or token.dep_ == 'nsubj':
         dec_made = True
   return dec_made
 
-def is_syn_with(phrase,given_phrase):
-  nlp = spacy.load("en_core_web_sm")
-  doc = nlp(phrase)
-  # this lemmatizes the noun
+# wordnet lookups are slow and the given phrases are a small fixed set
+@lru_cache(maxsize=None)
+def synonym_names(given_phrase):
+  from nltk.corpus import wordnet
+  names = set()
+  for syn in wordnet.synsets(given_phrase):
+    for lemma in syn.lemma_names():
+      names.add(lemma)
+  return frozenset(names)
+
+# lemmatizes a standalone word; only used when no parsed token is available
+@lru_cache(maxsize=1024)
+def lemma_of(phrase):
   lem_phrase = ''
-  names=[]
-  for token in doc:
+  for token in get_nlp()(phrase):
     lem_phrase =token.lemma_
+  return lem_phrase
+
+# phrase can be a Token from an existing parse (no re-parse) or a plain word
+def is_syn_with(phrase,given_phrase):
+  if isinstance(phrase, Token):
+    lem_phrase = phrase.lemma_
+  else:
+    lem_phrase = lemma_of(phrase)
   is_prob = False
-  for syn in wordnet.synsets(given_phrase):
-    for lemma in syn.lemma_names():
-      names.append(lemma)
-  if lem_phrase in names:
+  if lem_phrase in synonym_names(given_phrase):
     is_prob = True
   return is_prob
 
+# text can be a string or an already-parsed Doc (needs the dependency parser)
 def get_base(text):
-  nlp = spacy.load('en_core_web_sm')
   head_phrase =''
-  text_tokens = nlp(text)
+  text_tokens = as_doc(text)
   left_end = 0
   embed_verb_pos = 0
   embed_subj = ''
   prop_phrase = ''
   embed_text=''
   pre_embed_text =''
-  if is_indication_clause(text):
+  if is_indication_clause(text_tokens):
     for token in text_tokens:
       if token.head.dep_=='ROOT' and token.dep_=='ccomp':
         embed_text = ''
@@ -264,14 +282,14 @@ def get_base(text):
           embed_text = embed_text + ' ' + atoken.text
     embed_text = embed_text.strip()
     return get_base(embed_text)
-  elif is_probability_clause(text):
+  elif is_probability_clause(text_tokens):
     for token in text_tokens:
       if token.dep_ == 'acl' and token.head.head.dep_ == 'ROOT':
         if token.head.dep_ == 'attr' or token.head.dep_ == 'nsubj':
           for atoken in token.subtree:
             embed_text = embed_text + ' ' + atoken.text
         return get_base(embed_text)
-      elif token.dep_ == 'relcl' and is_syn_with(token.head.text,'chance') and token.head.head.dep_ =='ROOT':
+      elif token.dep_ == 'relcl' and is_syn_with(token.head,'chance') and token.head.head.dep_ =='ROOT':
         for atoken in token.subtree:
           if atoken.i > token.head.i+1 or atoken.text != 'that':
             embed_text = embed_text + ' ' + atoken.text
@@ -280,7 +298,7 @@ def get_base(text):
 
     return get_base(embed_text)
   else:
-    if is_equative(text) == False:
+    if is_equative(text_tokens) == False:
       for token in text_tokens:   #find where the root verb is
         if token.dep_ == 'ROOT':
           left_end = token.i
@@ -294,7 +312,7 @@ def get_base(text):
           head_phrase = prop_phrase + ' ' + head_phrase
     else:
       the_dep = 'attr' #for encrypting clauses
-      if is_encrypting(text)!=True:
+      if is_encrypting(text_tokens)!=True:
         the_dep = 'nsubj'  #for non-encrypting clauses
       for token in text_tokens:
         right_edge_index = 0
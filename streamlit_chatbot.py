@@ -4,10 +4,9 @@ import spacy
 from spacy.matcher import Matcher
 import re
 import pandas as pd
+import altair as alt
 import matplotlib.pyplot as plt
 from io import BytesIO
-from nltk.corpus import wordnet
-from spacy import displacy
 from pandas_automation import get_base
 from streamlit_google_auth import Authenticate
 import os
@@ -27,13 +26,19 @@ try:
 except Exception:
     pass
 
-if not DISABLE_AUTH:
-    authenticator = Authenticate(
+@st.cache_resource
+def get_authenticator():
+    # Holds only config (per-user state lives in st.session_state), so one instance
+    # serves every rerun and the credentials are read and parsed once per process
+    return Authenticate(
         secret_credentials_path='google_credentials.json',
         cookie_name='streamlit_auth_cookie',
         cookie_key='streamlit_auth_key',
         redirect_uri='http://localhost:8501',
     )
+
+if not DISABLE_AUTH:
+    authenticator = get_authenticator()
     authenticator.check_authentification()
     if not st.session_state['connected']:
         st.title("Statistics Chatbot")
@@ -52,19 +57,33 @@ with st.sidebar:
 # ------------------------------------
 # NLP setup
 # ------------------------------------
+# The feedback rules are purely lexical, so a regex/set path is used by default.
+# Set USE_SPACY (Streamlit secrets or env var) to run the spaCy pipeline instead.
+USE_SPACY = False
+try:
+    USE_SPACY = bool(st.secrets.get('USE_SPACY', False)) or bool(os.environ.get('USE_SPACY'))
+except Exception:
+    USE_SPACY = bool(os.environ.get('USE_SPACY'))
+
+def _load_model(name):
+    # Only POS tags, lemmas and sentence boundaries are used, so skip NER and
+    # swap the dependency parser for the (much cheaper) bundled senter
+    model = spacy.load(name, disable=["ner", "parser"])
+    model.enable_pipe("senter")
+    return model
+
 @st.cache_resource
 def load_nlp():
     try:
-        return spacy.load("en_core_web_sm")
+        return _load_model("en_core_web_sm")
     except Exception:
         try:
             from spacy.cli import download
             download("en_core_web_sm")
-            return spacy.load("en_core_web_sm")
+            return _load_model("en_core_web_sm")
         except Exception:
             # Fallback to md if sm fails to download in some environments
-            return spacy.load("en_core_web_md")
-nlp = load_nlp()
+            return _load_model("en_core_web_md")
 
 @st.cache_resource
 def build_matchers(_nlp):
@@ -73,9 +92,28 @@ def build_matchers(_nlp):
     matcher.add("COMPARATIVE", [[{"LEMMA": {"IN": ["more", "less", "greater", "lower", "higher"]}}]])
     matcher.add("CAUSAL", [[{"LEMMA": {"IN": ["cause", "lead", "result"]}}]])
     matcher.add("HEDGING", [[{"LOWER": {"IN": ["might", "may", "appears", "seems", "suggests"]}}]])
-    return matcher
-
-matcher = build_matchers(nlp)
+    # Integer ids let callers test hits without materializing label strings
+    label_ids = {name: _nlp.vocab.strings[name] for name in ("PERCENT_MENTION", "COMPARATIVE", "CAUSAL", "HEDGING")}
+    return matcher, label_ids
+
+# Built on first use (after sign-in) rather than at import, so page loads that
+# never analyze a message don't pay for loading the model
+def get_nlp():
+    return load_nlp()
+
+def get_matcher():
+    return build_matchers(get_nlp())
+
+# Lightweight equivalents of the matcher rules above
+_TOKEN_RE = re.compile(r"[A-Za-z']+|%|\d+(?:\.\d+)?")
+# Sentence ends, except after common abbreviations such as "e.g." and "i.e."
+_SENT_SPLIT_RE = re.compile(r"(?<=[.!?])(?<!\be\.g\.)(?<!\bi\.e\.)(?<!\betc\.)(?<!\bvs\.)\s+", re.IGNORECASE)
+LEMMA_SETS = {
+    "COMPARATIVE": frozenset({"more", "less", "greater", "lower", "higher"}),
+    "CAUSAL": frozenset({"cause", "caused", "causes", "causing", "lead", "led", "leads", "leading",
+                         "result", "resulted", "results", "resulting"}),
+    "HEDGING": frozenset({"might", "may", "appears", "seems", "suggests"}),
+}
 
 # ------------------------------------
 # Task definitions
@@ -131,74 +169,135 @@ TASKS = [
     }
 ]
 
+TASKS_BY_ID = {t["id"]: t for t in TASKS}
+
+# Precompile the per-task reference patterns once instead of on every message
+for _task in TASKS:
+    _exp = _task["expected"]
+    if _task["chart_type"] in ("bar", "pie"):
+        _task["_cat_re"] = re.compile(rf"\b{re.escape(_exp['category'].lower())}\b")
+    else:  # stacked_bar
+        _task["_grp_re"] = re.compile(rf"\b{re.escape(_exp['group'].lower())}\b")
+        _task["_sub_re"] = re.compile(rf"\b{re.escape(_exp['subcategory'].lower())}\b")
+
 # ------------------------------------
 # Chart renderers
 # ------------------------------------
-def render_chart(task):
+CHART_WIDTH, CHART_HEIGHT = 400, 280
+BASE_COLOR, SECOND_COLOR, HIGHLIGHT_COLOR = "#1f77b4", "#ff7f0e", "#d62728"  # matplotlib C0, C1, C3
+
+@st.cache_data(show_spinner=False)
+def _render_chart_png(task_id: str) -> bytes:
+    # Only the pie chart still goes through matplotlib; render it once per task
+    task = TASKS_BY_ID[task_id]
     fig, ax = plt.subplots(figsize=(5, 3.5))
-    if task["chart_type"] == "bar":
-        df = task["data"]
-        ax.bar(df["Category"], df["Percent"], color=["C0" if c != task["highlight"] else "C3" for c in df["Category"]])
-        ax.set_ylabel("Percent (%)")
-        ax.set_title("Bar chart of percent by category")
-        for i, p in enumerate(df["Percent"]):
-            ax.text(i, p + 1, f"{p}%", ha="center")
-    elif task["chart_type"] == "pie":
-        df = task["data"]
-        colors = ["C3" if seg == task["highlight"] else "C0" for seg in df["Segment"]]
-        ax.pie(df["Percent"], labels=df["Segment"], autopct="%1.0f%%", colors=colors)
-        ax.set_title("Pie chart of percent by segment")
-    elif task["chart_type"] == "stacked_bar":
-        df = task["data"]
-        groups = df["Group"].unique().tolist()  # ["G1","G2"]
-        subcats = df["Subcategory"].unique().tolist()  # ["Correct","Incorrect"]
-        width = 0.5
-        g1_vals = df["G1"].values
-        g2_vals = df["G2"].values
-        # Stacked bars
-        ax.bar([0], g1_vals[0], width, label=subcats[0], color="C0")
-        ax.bar([0], g1_vals[1], width, bottom=g1_vals[0], label=subcats[1], color="C1")
-        ax.bar([1], g2_vals[0], width, color="C0")
-        ax.bar([1], g2_vals[1], width, bottom=g2_vals[0], color="C1")
-        ax.set_xticks([0, 1])
-        ax.set_xticklabels(groups)
-        ax.set_ylabel("Percent within group (%)")
-        ax.set_title("Stacked bar: subcategory proportions by group")
-        focus = task["highlight"]
-        if focus["Group"] == "G2" and focus["Subcategory"] == "Correct":
-            ax.scatter([1], [g2_vals[0]], s=400, facecolors='none', edgecolors='C3', linewidths=2)
-        ax.legend(loc="upper right")
+    df = task["data"]
+    colors = ["C3" if seg == task["highlight"] else "C0" for seg in df["Segment"]]
+    ax.pie(df["Percent"], labels=df["Segment"], autopct="%1.0f%%", colors=colors)
+    ax.set_title("Pie chart of percent by segment")
     buf = BytesIO()
     plt.tight_layout()
-    fig.savefig(buf, format="png")
+    # Fast zlib level: noticeably quicker to encode for a slightly larger PNG
+    fig.savefig(buf, format="png", bbox_inches=None, pil_kwargs={"compress_level": 1})
     plt.close(fig)
-    buf.seek(0)
-    return buf
+    return buf.getvalue()
+
+def _bar_chart(task):
+    df = task["data"]
+    base = alt.Chart(df, title="Bar chart of percent by category").encode(
+        x=alt.X("Category:N", axis=alt.Axis(labelAngle=0)),
+        y=alt.Y("Percent:Q", title="Percent (%)"),
+    )
+    bars = base.mark_bar().encode(
+        color=alt.condition(alt.datum.Category == task["highlight"], alt.value(HIGHLIGHT_COLOR), alt.value(BASE_COLOR))
+    )
+    labels = base.mark_text(dy=-6).transform_calculate(label="datum.Percent + '%'").encode(text="label:N")
+    return (bars + labels).properties(width=CHART_WIDTH, height=CHART_HEIGHT)
+
+def _stacked_bar_chart(task):
+    df = task["data"]
+    groups = df["Group"].unique().tolist()  # ["G1","G2"]
+    subcats = df["Subcategory"].unique().tolist()  # ["Correct","Incorrect"]
+    long_df = df.melt(id_vars="Subcategory", value_vars=groups, var_name="Group", value_name="Percent")
+    long_df["order"] = long_df["Subcategory"].map(subcats.index)
+    focus = task["highlight"]
+    is_focus = (alt.datum.Group == focus["Group"]) & (alt.datum.Subcategory == focus["Subcategory"])
+    return alt.Chart(long_df, title="Stacked bar: subcategory proportions by group").mark_bar(size=60).encode(
+        x=alt.X("Group:N", sort=groups, axis=alt.Axis(labelAngle=0)),
+        y=alt.Y("Percent:Q", title="Percent within group (%)"),
+        color=alt.Color("Subcategory:N", scale=alt.Scale(domain=subcats, range=[BASE_COLOR, SECOND_COLOR])),
+        order=alt.Order("order:Q"),
+        stroke=alt.condition(is_focus, alt.value(HIGHLIGHT_COLOR), alt.value(None)),
+        strokeWidth=alt.condition(is_focus, alt.value(3), alt.value(0)),
+    ).properties(width=CHART_WIDTH, height=CHART_HEIGHT)
+
+def render_chart(task):
+    """Draw the task's chart into the current container."""
+    if task["chart_type"] == "pie":
+        st.image(_render_chart_png(task["id"]), caption=task["title"], width=CHART_WIDTH)
+        return
+    # Bars are rendered client-side by Vega-Lite, so there is no server-side rasterization
+    chart = _bar_chart(task) if task["chart_type"] == "bar" else _stacked_bar_chart(task)
+    st.altair_chart(chart, use_container_width=False)
+    st.caption(task["title"])
 
 # ------------------------------------
 # Analysis & feedback
 # ------------------------------------
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:%|percent|percentage)", re.IGNORECASE)
+_DATA_IS_RE = re.compile(r"\bdata is\b")
+_PERCENT_UNIT_RE = re.compile(r"\bpercent(?:age)?\b")
+_SENT_SPLITTERS = frozenset({",", ";", "—"})
+_VERBAL = frozenset({"VERB", "AUX"})
+
 def extract_percentages(text):
-    nums = []
-    for m in re.finditer(r"(\d+(\.\d+)?)\s*(%|percent|percentage)", text.lower()):
-        nums.append(float(m.group(1)))
-    return nums
+    return [float(m.group(1)) for m in _PERCENT_RE.finditer(text)]
 
-def grammar_checks(doc):
+def grammar_checks(doc, lowered):
     issues = []
-    if re.search(r"\bdata is\b", doc.text.lower()):
+    if _DATA_IS_RE.search(lowered):
         issues.append("Consider using 'data are' in formal statistical writing (if your style guide prefers plural).")
     for sent in doc.sents:
-        if not any(t.pos_ in ("VERB", "AUX") for t in sent):
+        # Walk each sentence once, collecting both the verb and splitter checks
+        has_verb = False; has_splitter = False; n = 0
+        for t in sent:
+            n += 1
+            if t.pos_ in _VERBAL: has_verb = True
+            if t.text in _SENT_SPLITTERS: has_splitter = True
+        if not has_verb:
             issues.append(f"Possible fragment: '{sent.text.strip()}'. Add a verb for a complete sentence.")
-        if len(sent) > 40 and not any(t.text in [",", ";", "—"] for t in sent):
+        if n > 40 and not has_splitter:
+            issues.append("Long sentence detected; consider splitting for clarity.")
+    return issues
+
+def lexical_labels(lowered):
+    tokens = set(_TOKEN_RE.findall(lowered))
+    return {label for label, words in LEMMA_SETS.items() if not tokens.isdisjoint(words)}
+
+def simple_grammar_checks(text, lowered):
+    issues = []
+    if _DATA_IS_RE.search(lowered):
+        issues.append("Consider using 'data are' in formal statistical writing (if your style guide prefers plural).")
+    # Without POS tags a verb can't be detected reliably, so the fragment check is spaCy-only
+    for sent in _SENT_SPLIT_RE.split(text):
+        words = _TOKEN_RE.findall(sent)
+        if len(words) > 40 and not any(c in sent for c in _SENT_SPLITTERS):
             issues.append("Long sentence detected; consider splitting for clarity.")
     return issues
 
 def analyze_text(user_text, task):
-    doc = nlp(user_text.strip())
-    hits = matcher(doc)
-    match_labels = set(nlp.vocab.strings[m_id] for m_id, s, e in hits)
+    text = user_text.strip()
+    lowered = text.lower()
+    if USE_SPACY:
+        doc = get_nlp()(text)
+        matcher, label_ids = get_matcher()
+        hit_ids = {m_id for m_id, _, _ in matcher(doc)}
+        has_causal = label_ids["CAUSAL"] in hit_ids
+        has_hedging = label_ids["HEDGING"] in hit_ids
+    else:
+        match_labels = lexical_labels(lowered)
+        has_causal = "CAUSAL" in match_labels
+        has_hedging = "HEDGING" in match_labels
     exp = task["expected"]
     
     # feeback about the base
@@ -210,7 +309,7 @@ def analyze_text(user_text, task):
         base_msgs.append("ℹ️ Consider mentioning the base (e.g., 'out of 100 observations') for clarity.")
 
     # Percent correctness
-    percents = extract_percentages(doc.text)
+    percents = extract_percentages(text)
     tol = 1.0
     percent_msgs = []
     if percents:
@@ -224,21 +323,21 @@ def analyze_text(user_text, task):
         percent_msgs.append("ℹ️ Try stating the percentage explicitly (e.g., '40%').")
 
     # Unit presence
-    unit_msgs = ["✅ You included percentage units, good."] if ("%" in doc.text or re.search(r"\bpercent(age)?\b", doc.text.lower())) \
+    unit_msgs = ["✅ You included percentage units, good."] if ("%" in text or _PERCENT_UNIT_RE.search(lowered)) \
                 else ["ℹ️ Include units (e.g., '%') to make your statement precise."]
 
     # Category/group references
     cat_msgs = []
     if task["chart_type"] in ("bar", "pie"):
         cat = exp["category"]
-        if re.search(rf"\b{re.escape(cat.lower())}\b", doc.text.lower()):
+        if task["_cat_re"].search(lowered):
             cat_msgs.append(f"✅ You referenced the correct category (‘{cat}’).")
         else:
             cat_msgs.append(f"ℹ️ Mention the category name (‘{cat}’) to make the claim explicit.")
     else:  # stacked_bar
         grp = exp["group"]; sub = exp["subcategory"]
-        has_grp = re.search(rf"\b{re.escape(grp.lower())}\b", doc.text.lower())
-        has_sub = re.search(rf"\b{re.escape(sub.lower())}\b", doc.text.lower())
+        has_grp = task["_grp_re"].search(lowered)
+        has_sub = task["_sub_re"].search(lowered)
         if has_grp and has_sub:
             cat_msgs.append(f"✅ You referenced both the group (‘{grp}’) and subcategory (‘{sub}’).")
         else:
@@ -249,13 +348,13 @@ def analyze_text(user_text, task):
 
     # Language use
     lang_msgs = []
-    if "CAUSAL" in match_labels:
+    if has_causal:
         lang_msgs.append("⚠️ Avoid causal language when interpreting descriptive charts. Prefer phrasing like ‘represents’, ‘accounts for’, or ‘share of’.")
-    if "HEDGING" in match_labels:
+    if has_hedging:
         lang_msgs.append("✅ Hedging language detected. Neutral phrasing is fine; ensure clarity about what the percentage represents.")
 
     # Grammar
-    gram_msgs = grammar_checks(doc)
+    gram_msgs = grammar_checks(doc, lowered) if USE_SPACY else simple_grammar_checks(text, lowered)
 
     return {
         "Content Accuracy": percent_msgs + cat_msgs,
@@ -265,6 +364,11 @@ def analyze_text(user_text, task):
         "The base you gave": base_msgs
     }
 
+@st.cache_data(show_spinner=False, max_entries=512)
+def _analyze_text_cached(prompt: str, task_id: str) -> dict:
+    # Feedback depends only on the prompt and the task, so repeated prompts are free
+    return analyze_text(prompt, TASKS_BY_ID[task_id])
+
 # ------------------------------------
 # Session state (chat)
 # ------------------------------------
@@ -287,7 +391,7 @@ def init_state():
         else:
             st.session_state.task_index = 0
     if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []  # list of dicts: {role: "user"/"assistant", text: str, task_id: str}
+        st.session_state.chat_history = []  # list of dicts: {role: "user"/"assistant", text: str, task_id: str}; charts use {kind: "chart"} instead of text
     if "started" not in st.session_state:
         st.session_state.started = False
 
@@ -299,51 +403,60 @@ def current_task():
 # ------------------------------------
 # Assistant helpers
 # ------------------------------------
-def assistant_say(text, task_id=None, allow_markdown=True):
-    with st.chat_message("assistant"):
-        if allow_markdown:
-            st.markdown(text)
-        else:
-            st.write(text)
-    st.session_state.chat_history.append({"role": "assistant", "text": text, "task_id": task_id or current_task()["id"]})
+def render_message(msg):
+    if msg.get("kind") == "chart":
+        task_for_chart = TASKS_BY_ID.get(msg["task_id"], current_task())
+        with st.chat_message("assistant"):
+            render_chart(task_for_chart)
+    else:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["text"])
+
+# draw=False only records the message, for callbacks and paths followed by st.rerun()
+# (the message is then drawn by the next replay)
+def _record(msg, draw):
+    st.session_state.chat_history.append(msg)
+    if draw:
+        render_message(msg)
 
-def user_say(text, task_id=None):
-    with st.chat_message("user"):
-        st.markdown(text)
-    st.session_state.chat_history.append({"role": "user", "text": text, "task_id": task_id or current_task()["id"]})
+def assistant_say(text, task_id=None, draw=True):
+    _record({"role": "assistant", "text": text, "task_id": task_id or current_task()["id"]}, draw)
 
-def show_chart_in_chat(task):
-    chart = render_chart(task)
-    with st.chat_message("assistant"):
-        st.image(chart, caption=task["title"], width=400)
-    st.session_state.chat_history.append({"role": "assistant", "text": f"[Chart displayed: {task['title']}]", "task_id": task["id"]})
+def user_say(text, task_id=None, draw=True):
+    _record({"role": "user", "text": text, "task_id": task_id or current_task()["id"]}, draw)
+
+def show_chart_in_chat(task, draw=True):
+    _record({"role": "assistant", "kind": "chart", "task_id": task["id"]}, draw)
 
 def show_quick_replies():
     cols = st.columns([1,1,1,1])
     with cols[0]:
-        st.button("Model exemplar", key=f"exemplar_{st.session_state.task_index}", on_click=lambda: assistant_say(f"**Exemplar:** {current_task()['expected']['text']}", current_task()["id"]))
+        st.button("Model exemplar", key=f"exemplar_{st.session_state.task_index}", on_click=lambda: assistant_say(f"**Exemplar:** {current_task()['expected']['text']}", current_task()["id"], draw=False))
     with cols[1]:
-        st.button("Remind prompt", key=f"remind_{st.session_state.task_index}", on_click=lambda: assistant_say(current_task()["description"], current_task()["id"]))
+        st.button("Remind prompt", key=f"remind_{st.session_state.task_index}", on_click=lambda: assistant_say(current_task()["description"], current_task()["id"], draw=False))
     with cols[2]:
-        st.button("Show chart again", key=f"chart_{st.session_state.task_index}", on_click=lambda: show_chart_in_chat(current_task()))
+        st.button("Show chart again", key=f"chart_{st.session_state.task_index}", on_click=lambda: show_chart_in_chat(current_task(), draw=False))
     with cols[3]:
         can_advance = st.session_state.task_index < len(TASKS)-1
-        st.button("Next task →", key=f"next_{st.session_state.task_index}", disabled=not can_advance, on_click=advance_task)
+        # Changing task affects the navigation above the thread, so rerun the whole app
+        if st.button("Next task →", key=f"next_{st.session_state.task_index}", disabled=not can_advance):
+            advance_task()
+            st.rerun()
 
 def advance_task():
     if st.session_state.task_index < len(TASKS)-1:
         st.session_state.task_index += 1
         t = current_task()
-        assistant_say(f"**{t['title']}**\n\n{t['description']}", t["id"])
-        show_chart_in_chat(t)
+        assistant_say(f"**{t['title']}**\n\n{t['description']}", t["id"], draw=False)
+        show_chart_in_chat(t, draw=False)
 
 def jump_to_task(task_index):
     """Jump to a specific task by index"""
     if 0 <= task_index < len(TASKS):
         st.session_state.task_index = task_index
         t = current_task()
-        assistant_say(f"**{t['title']}**\n\n{t['description']}", t["id"])
-        show_chart_in_chat(t)
+        assistant_say(f"**{t['title']}**\n\n{t['description']}", t["id"], draw=False)
+        show_chart_in_chat(t, draw=False)
 
 # ------------------------------------
 # UI header
@@ -369,38 +482,28 @@ st.markdown("---")
 if not st.session_state.started:
     t = current_task()
     st.session_state.chat_history.append({"role": "assistant", "text": f"Hi! Let's start with **{t['title']}**.\n\n{t['description']}", "task_id": t["id"]})
-    st.session_state.chat_history.append({"role": "assistant", "text": f"[Chart displayed: {t['title']}]", "task_id": t["id"]})
+    st.session_state.chat_history.append({"role": "assistant", "kind": "chart", "task_id": t["id"]})
     st.session_state.chat_history.append({"role": "assistant", "text": "When you're ready, type your description (e.g., *'Category B accounts for 40% of the total...'*).", "task_id": t["id"]})
     st.session_state.started = True
     st.rerun()
 
 # ------------------------------------
-# Replay chat history
+# Chat thread
 # ------------------------------------
-for msg in st.session_state.chat_history:
-    if msg["text"].startswith("[Chart displayed:"):
-        # Find the task by looking through TASKS
-        task_for_chart = next((task for task in TASKS if task["id"] == msg["task_id"]), current_task())
-        chart = render_chart(task_for_chart)
-        with st.chat_message("assistant"):
-            st.image(chart, caption=task_for_chart["title"], width=400)
-    else:
-        with st.chat_message(msg["role"]):
-            st.markdown(msg["text"])
+# The input is pinned to the bottom of the page, so it can be read before the thread is drawn
+prompt = st.chat_input("Write your description here…")
 
-# Quick helpers under the thread
-show_quick_replies()
+# Settled history is drawn on full runs only; quick-reply clicks rerun just the
+# fragment below, which draws the messages added since then
+for msg in st.session_state.chat_history:
+    render_message(msg)
 
-# ------------------------------------
-# Chat input
-# ------------------------------------
-prompt = st.chat_input("Write your description here…")
 if prompt:
     # Route to current task
     t = current_task()
     user_say(prompt, t["id"])
     # Analyze and reply with structured feedback
-    fb = analyze_text(prompt, t)
+    fb = _analyze_text_cached(prompt, t["id"])
 
     # Compose assistant reply (chat-friendly)
     bullet = []
@@ -408,11 +511,7 @@ if prompt:
         if items:
             bullet.append(f"**{sec}**")
             bullet.extend([f"- {i}" for i in items])
-    
-    # Debug: check what's in fb
-    st.write("DEBUG - Feedback sections:", list(fb.keys()))
-    st.write("DEBUG - Base msgs:", fb.get("The base you gave", []))
-    
+
     reply = "\n".join(bullet) if bullet else "Thanks! I didn't find any specific issues. If you'd like, I can show the exemplar."
     assistant_say(reply, t["id"]) 
 
@@ -421,3 +520,17 @@ if prompt:
     if incorrect:
         assistant_say(f"Would you like to see an exemplar for this task?\n\n**Exemplar:** {t['expected']['text']}", t["id"])
 
+st.session_state.settled_len = len(st.session_state.chat_history)
+
+# (st.fragment needs Streamlit 1.37+, st.experimental_fragment 1.33+)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+@_fragment
+def chat_thread():
+    for msg in st.session_state.chat_history[st.session_state.settled_len:]:
+        render_message(msg)
+
+    # Quick helpers under the thread
+    show_quick_replies()
+
+chat_thread()
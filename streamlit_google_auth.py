@@ -1,3 +1,5 @@
+import functools
+import http.cookiejar
 import json
 import os
 import urllib.parse
@@ -15,14 +17,99 @@ GOOGLE_AUTH_ENDPOINT = "https://accounts.google.com/o/oauth2/v2/auth"
 GOOGLE_TOKEN_ENDPOINT = "https://oauth2.googleapis.com/token"
 GOOGLE_USERINFO_ENDPOINT = "https://openidconnect.googleapis.com/v1/userinfo"
 
+# One process-global session, shared by every user's sign-in, so keep-alive
+# connections to the token and userinfo hosts are reused across logins. It is
+# only used for pooling: cookies are never stored, so nothing carries over
+# from one user's requests to the next.
+_HTTP_SESSION = requests.Session() if requests else None
+if _HTTP_SESSION is not None:
+    _HTTP_SESSION.headers.update({"User-Agent": "streamlit-auth/1.0"})
+    _HTTP_SESSION.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
 
-@dataclass
+
+@dataclass(frozen=True)
 class _OAuthConfig:
     client_id: str
     client_secret: str
     auth_uri: str
     token_uri: str
     redirect_uri: str
+    # Redirect URIs listed in google_credentials.json (empty when using secrets)
+    allowed_redirect_uris: tuple[str, ...] = ()
+
+
+def _load_config(secret_path: str, redirect_uri: str) -> _OAuthConfig:
+    # 1) Prefer Streamlit secrets when available (for Cloud)
+    try:
+        secrets_obj = st.secrets  # Access may raise StreamlitSecretNotFoundError locally
+        # Support both flat and nested secrets structures
+        sid = secrets_obj.get("GOOGLE_CLIENT_ID")
+        ssecret = secrets_obj.get("GOOGLE_CLIENT_SECRET")
+        sredirect = secrets_obj.get("REDIRECT_URI")
+        # Nested: [auth.google] and [auth]
+        try:
+            if not sid:
+                sid = secrets_obj.get("auth", {}).get("google", {}).get("GOOGLE_CLIENT_ID")
+            if not ssecret:
+                ssecret = secrets_obj.get("auth", {}).get("google", {}).get("GOOGLE_CLIENT_SECRET")
+            if not sredirect:
+                sredirect = secrets_obj.get("auth", {}).get("REDIRECT_URI")
+        except Exception:
+            pass
+        sredirect = sredirect or redirect_uri
+        sauth = secrets_obj.get("AUTH_URI") or GOOGLE_AUTH_ENDPOINT
+        stoken = secrets_obj.get("TOKEN_URI") or GOOGLE_TOKEN_ENDPOINT
+        if sid and ssecret and sredirect:
+            return _OAuthConfig(
+                client_id=sid,
+                client_secret=ssecret,
+                auth_uri=sauth,
+                token_uri=stoken,
+                redirect_uri=sredirect,
+            )
+    except Exception:
+        # No secrets configured; continue with local file
+        pass
+
+    # 2) Fallback to local JSON file for dev
+    if not os.path.exists(secret_path):
+        raise FileNotFoundError(
+            f"Google credentials file not found at '{secret_path}'. "
+            "Download your OAuth client JSON and place it there, or set Streamlit secrets."
+        )
+    with open(secret_path, "r", encoding="utf-8") as f:
+        try:
+            content = f.read().strip()
+            if not content:
+                raise ValueError(
+                    "google_credentials.json is empty. Download your OAuth client JSON from Google Cloud Console and place it here."
+                )
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ValueError(
+                "google_credentials.json is not valid JSON. Replace it with the downloaded OAuth client JSON.\n"
+                "You can use google_credentials_template.json as a reference."
+            ) from e
+
+    # Support both 'web' and 'installed' style JSONs
+    block = data.get("web") or data.get("installed") or {}
+    client_id = block.get("client_id")
+    client_secret = block.get("client_secret")
+    auth_uri = block.get("auth_uri") or GOOGLE_AUTH_ENDPOINT
+    token_uri = block.get("token_uri") or GOOGLE_TOKEN_ENDPOINT
+
+    if not client_id or not client_secret:
+        raise ValueError("Invalid google_credentials.json: missing client_id or client_secret")
+
+    # Redirect uri is validated in Authenticate.login() so every session sees the warning
+    return _OAuthConfig(
+        client_id=client_id,
+        client_secret=client_secret,
+        auth_uri=auth_uri,
+        token_uri=token_uri,
+        redirect_uri=redirect_uri,
+        allowed_redirect_uris=tuple(sorted(set(block.get("redirect_uris", [])))),
+    )
 
 
 class Authenticate:
@@ -62,7 +149,7 @@ class Authenticate:
         self.cookie_key = cookie_key
         self.redirect_uri = redirect_uri
         self.scopes = scopes or ["openid", "email", "profile"]
-        self._cfg = self._load_config()
+        self._cfg = _load_config(self.secret_path, self.redirect_uri)
 
     # Keep the misspelling to match existing app usage
     def check_authentification(self) -> None:
@@ -76,6 +163,8 @@ class Authenticate:
         if st.session_state.get("connected"):
             return
 
+        self._warn_redirect_mismatch()
+
         if requests is None:
             st.error(
                 "The 'requests' package is required for Google sign-in.\n"
@@ -155,89 +244,21 @@ class Authenticate:
 
     # ----- Internal helpers -----
 
-    def _load_config(self) -> _OAuthConfig:
-        # 1) Prefer Streamlit secrets when available (for Cloud)
-        try:
-            secrets_obj = st.secrets  # Access may raise StreamlitSecretNotFoundError locally
-            # Support both flat and nested secrets structures
-            sid = secrets_obj.get("GOOGLE_CLIENT_ID")
-            ssecret = secrets_obj.get("GOOGLE_CLIENT_SECRET")
-            sredirect = secrets_obj.get("REDIRECT_URI")
-            # Nested: [auth.google] and [auth]
-            try:
-                if not sid:
-                    sid = secrets_obj.get("auth", {}).get("google", {}).get("GOOGLE_CLIENT_ID")
-                if not ssecret:
-                    ssecret = secrets_obj.get("auth", {}).get("google", {}).get("GOOGLE_CLIENT_SECRET")
-                if not sredirect:
-                    sredirect = secrets_obj.get("auth", {}).get("REDIRECT_URI")
-            except Exception:
-                pass
-            sredirect = sredirect or self.redirect_uri
-            sauth = secrets_obj.get("AUTH_URI") or GOOGLE_AUTH_ENDPOINT
-            stoken = secrets_obj.get("TOKEN_URI") or GOOGLE_TOKEN_ENDPOINT
-            if sid and ssecret and sredirect:
-                return _OAuthConfig(
-                    client_id=sid,
-                    client_secret=ssecret,
-                    auth_uri=sauth,
-                    token_uri=stoken,
-                    redirect_uri=sredirect,
-                )
-        except Exception:
-            # No secrets configured; continue with local file
-            pass
-
-        # 2) Fallback to local JSON file for dev
-        if not os.path.exists(self.secret_path):
-            raise FileNotFoundError(
-                f"Google credentials file not found at '{self.secret_path}'. "
-                "Download your OAuth client JSON and place it there, or set Streamlit secrets."
-            )
-        with open(self.secret_path, "r", encoding="utf-8") as f:
-            try:
-                content = f.read().strip()
-                if not content:
-                    raise ValueError(
-                        "google_credentials.json is empty. Download your OAuth client JSON from Google Cloud Console and place it here."
-                    )
-                data = json.loads(content)
-            except json.JSONDecodeError as e:
-                raise ValueError(
-                    "google_credentials.json is not valid JSON. Replace it with the downloaded OAuth client JSON.\n"
-                    "You can use google_credentials_template.json as a reference."
-                ) from e
-
-        # Support both 'web' and 'installed' style JSONs
-        block = data.get("web") or data.get("installed") or {}
-        client_id = block.get("client_id")
-        client_secret = block.get("client_secret")
-        auth_uri = block.get("auth_uri") or GOOGLE_AUTH_ENDPOINT
-        token_uri = block.get("token_uri") or GOOGLE_TOKEN_ENDPOINT
-
-        if not client_id or not client_secret:
-            raise ValueError("Invalid google_credentials.json: missing client_id or client_secret")
-
+    def _warn_redirect_mismatch(self) -> None:
         # Validate redirect uri
-        ru = self.redirect_uri
-        allowed = set(block.get("redirect_uris", []))
+        ru = self._cfg.redirect_uri
+        allowed = self._cfg.allowed_redirect_uris
         if allowed and ru not in allowed:
             st.warning(
                 "The redirect_uri configured in code does not match the URIs in google_credentials.json.\n"
                 f"Configured: {ru}\n"
-                f"Allowed: {sorted(allowed)}\n"
+                f"Allowed: {list(allowed)}\n"
                 "Google will reject the login if they don't match."
             )
 
-        return _OAuthConfig(
-            client_id=client_id,
-            client_secret=client_secret,
-            auth_uri=auth_uri,
-            token_uri=token_uri,
-            redirect_uri=ru,
-        )
-
-    def _authorization_url(self) -> str:
+    @functools.cached_property
+    def _auth_url_prefix(self) -> str:
+        # Everything except 'state' is fixed per instance, so encode it on first use only
         params = {
             "client_id": self._cfg.client_id,
             "redirect_uri": self._cfg.redirect_uri,
@@ -247,18 +268,22 @@ class Authenticate:
             "include_granted_scopes": "true",
             "prompt": "select_account",
         }
+        base = self._cfg.auth_uri or GOOGLE_AUTH_ENDPOINT
+        # Prefer the v2 endpoint for OpenID scopes when possible
+        if "oauth2/auth" in base and "v2" not in base:
+            base = GOOGLE_AUTH_ENDPOINT
+        return f"{base}?{urllib.parse.urlencode(params, doseq=True)}"
+
+    def _authorization_url(self) -> str:
         # Keep current non-OAuth params (e.g., task) across the redirect using 'state'
         try:
             keep = {k: v for k, v in st.query_params.items() if k not in {"code", "scope", "authuser", "prompt"}}
             if keep:
-                params["state"] = urllib.parse.urlencode(keep, doseq=True)
+                state = urllib.parse.urlencode(keep, doseq=True)
+                return f"{self._auth_url_prefix}&{urllib.parse.urlencode({'state': state})}"
         except Exception:
             pass
-        base = self._cfg.auth_uri or GOOGLE_AUTH_ENDPOINT
-        # Prefer the v2 endpoint for OpenID scopes when possible
-        if "oauth2/auth" in base and "v2" not in base:
-            base = GOOGLE_AUTH_ENDPOINT
-        return f"{base}?{urllib.parse.urlencode(params, doseq=True)}"
+        return self._auth_url_prefix
 
     def _exchange_code_for_tokens(self, code: str) -> dict | None:
         data = {
@@ -281,7 +306,7 @@ class Authenticate:
                 )
             except Exception:
                 pass
-            resp = requests.post(self._cfg.token_uri or GOOGLE_TOKEN_ENDPOINT, data=data, timeout=15)
+            resp = _HTTP_SESSION.post(self._cfg.token_uri or GOOGLE_TOKEN_ENDPOINT, data=data, timeout=15)
             if resp.status_code != 200:
                 try:
                     st.error(
@@ -301,7 +326,7 @@ class Authenticate:
             return None
         headers = {"Authorization": f"Bearer {access_token}"}
         try:
-            resp = requests.get(GOOGLE_USERINFO_ENDPOINT, headers=headers, timeout=15)
+            resp = _HTTP_SESSION.get(GOOGLE_USERINFO_ENDPOINT, headers=headers, timeout=15)
             if resp.status_code != 200:
                 return None
             return resp.json()